@@ -0,0 +1,22 @@
+"""
+Build motion_kernels, an ahead-of-time compiled copy of the Numba kernels.
+
+    python compile_kernels.py
+
+motion_detector imports the resulting extension when numba itself is not
+installed, so the fused pipeline still runs without numba and without any
+compile step at startup. pycc does not support parallel loops, so these
+builds run on a single thread; with numba installed the parallel JIT
+kernels (compiled at import and cached) are preferred.
+"""
+from numba.pycc import CC
+
+import motion_detector
+
+cc = CC('motion_kernels')
+cc.export('fused_motion', motion_detector.FUSED_MOTION_SIGNATURE)(motion_detector._fused_motion)
+cc.export('fused_motion_swar', motion_detector.FUSED_MOTION_SWAR_SIGNATURE)(motion_detector._fused_motion_swar)
+cc.export('bbox_of_above', motion_detector.BBOX_OF_ABOVE_SIGNATURE)(motion_detector._bbox_of_above)
+
+if __name__ == "__main__":
+    cc.compile()
@@ -1,10 +1,171 @@
 import cv2
 import numpy as np
-from PIL import Image
 import mss
 import time
 import os
-from datetime import datetime
+import math
+import queue
+import threading
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional, see the kernel setup below
+    njit = None
+    prange = range
+
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR
+except ImportError:  # PyTurboJPEG is optional, saving falls back to cv2.imwrite
+    TurboJPEG = None
+
+
+# Screen regions ignored by motion detection, as (x0, y0, x1, y1) in
+# full-resolution pixels. The bounds work like slice bounds: negative values
+# count back from the right or bottom edge and None runs to the edge.
+DEFAULT_MASK_RECTS = (
+    (0, -150, 1600, None),  # Bottom left corner (timestamp region)
+    (-450, 0, None, None),  # Right edge
+    (0, 0, None, 140),  # Top portion
+)
+
+
+def _resolve_rect(rect, width, height):
+    """Turn a mask rect into absolute (x0, y0, x1, y1) for a frame of the given size"""
+    x0, y0, x1, y1 = rect
+    x0, x1, _ = slice(x0, x1).indices(width)
+    y0, y1, _ = slice(y0, y1).indices(height)
+    return x0, y0, x1, y1
+
+
+# Kernel signatures are pinned so numba compiles them at import (and caches the
+# result) instead of stalling on the first frame. compile_kernels.py reuses them
+# to build the ahead-of-time motion_kernels module.
+FUSED_MOTION_SIGNATURE = 'void(uint8[:, :, ::1], uint8[:, ::1], uint8[:, ::1], uint8, int64, uint8[:, ::1], uint8[:, ::1])'
+FUSED_MOTION_SWAR_SIGNATURE = 'void(uint64[:, ::1], uint8[:, ::1], uint8[:, ::1], uint8, int64, uint8[:, ::1], uint8[:, ::1])'
+BBOX_OF_ABOVE_SIGNATURE = 'UniTuple(int64, 5)(uint8[:, ::1])'
+
+# Selects alternate bytes of a word, splitting two BGRA pixels into 16-bit lanes
+_LANE_MASK = np.uint64(0x00FF00FF00FF00FF)
+_LANE = np.uint64(0xFFFF)
+_SHIFT_8 = np.uint64(8)
+_SHIFT_16 = np.uint64(16)
+_SHIFT_32 = np.uint64(32)
+_SHIFT_48 = np.uint64(48)
+
+
+def _fused_motion(bgra, prev_gray, inv_mask, thresh_val, scale, out_thresh, out_gray):
+    """
+    Grayscale, downscale, diff, threshold and mask a frame in one pass.
+
+    Each output pixel is the BT.601 integer gray level
+    ((29*B + 150*G + 77*R) >> 8) averaged over a scale x scale block of
+    the BGRA frame. It is written to out_gray, and out_thresh is set to
+    255 where it differs from prev_gray by more than thresh_val outside
+    the ignored regions, 0 elsewhere.
+    """
+    height, width = out_gray.shape
+    block = scale * scale * 256
+    for y in prange(height):
+        for x in range(width):
+            acc = 0
+            for dy in range(scale):
+                row = y * scale + dy
+                for dx in range(scale):
+                    col = x * scale + dx
+                    acc += bgra[row, col, 0] * 29 + bgra[row, col, 1] * 150 + bgra[row, col, 2] * 77
+            g = acc // block
+            d = g - prev_gray[y, x]
+            if d < 0:
+                d = -d
+            out_thresh[y, x] = 255 if (d > thresh_val and inv_mask[y, x]) else 0
+            out_gray[y, x] = g
+
+
+def _fused_motion_swar(words, prev_gray, inv_mask, thresh_val, scale, out_thresh, out_gray):
+    """
+    Same as _fused_motion, reading the frame as 64-bit words.
+
+    words is the BGRA frame viewed as uint64, two pixels per word, so scale
+    must be even. Each word is split with one mask into 16-bit lanes holding
+    B0, R0, B1, R1 and, shifted by a byte, G0, A0, G1, A1. A whole block is
+    summed lane-wise before the channels are combined, which keeps each lane
+    below 65536 for scale up to 22. Gives exactly the same result as
+    _fused_motion.
+    """
+    height, width = out_gray.shape
+    block = scale * scale * 256
+    half = scale // 2
+    for y in prange(height):
+        for x in range(width):
+            br = np.uint64(0)
+            ga = np.uint64(0)
+            for dy in range(scale):
+                row = y * scale + dy
+                for dx in range(half):
+                    p = words[row, x * half + dx]
+                    br += p & _LANE_MASK
+                    ga += (p >> _SHIFT_8) & _LANE_MASK
+            b = (br & _LANE) + ((br >> _SHIFT_32) & _LANE)
+            r = ((br >> _SHIFT_16) & _LANE) + ((br >> _SHIFT_48) & _LANE)
+            g = (ga & _LANE) + ((ga >> _SHIFT_32) & _LANE)
+            gray = (int(b) * 29 + int(g) * 150 + int(r) * 77) // block
+            d = gray - prev_gray[y, x]
+            if d < 0:
+                d = -d
+            out_thresh[y, x] = 255 if (d > thresh_val and inv_mask[y, x]) else 0
+            out_gray[y, x] = gray
+
+
+def _bbox_of_above(thresh):
+    """
+    Bounding box and count of all non-zero pixels in a binary image.
+
+    Rows are scanned in parallel, each producing its own count and
+    column extent, and the per-row results are then reduced serially.
+    Returns (xmin, ymin, xmax, ymax, count) with inclusive bounds; the
+    bounds are meaningless when count is 0.
+    """
+    height, width = thresh.shape
+    row_count = np.zeros(height, dtype=np.int64)
+    row_min = np.empty(height, dtype=np.int64)
+    row_max = np.empty(height, dtype=np.int64)
+    for y in prange(height):
+        count = 0
+        lo = width
+        hi = -1
+        for x in range(width):
+            if thresh[y, x]:
+                count += 1
+                if x < lo:
+                    lo = x
+                hi = x
+        row_count[y] = count
+        row_min[y] = lo
+        row_max[y] = hi
+
+    xmin, ymin, xmax, ymax, count = width, height, -1, -1, 0
+    for y in range(height):
+        if row_count[y]:
+            count += row_count[y]
+            xmin = min(xmin, row_min[y])
+            xmax = max(xmax, row_max[y])
+            if ymin == height:
+                ymin = y
+            ymax = y
+    return xmin, ymin, xmax, ymax, count
+
+
+if njit is not None:
+    fused_motion = njit(FUSED_MOTION_SIGNATURE, parallel=True, fastmath=True, cache=True)(_fused_motion)
+    fused_motion_swar = njit(FUSED_MOTION_SWAR_SIGNATURE, parallel=True, fastmath=True, cache=True)(
+        _fused_motion_swar)
+    bbox_of_above = njit(BBOX_OF_ABOVE_SIGNATURE, parallel=True, cache=True)(_bbox_of_above)
+else:
+    try:
+        from motion_kernels import fused_motion, fused_motion_swar, bbox_of_above  # built by compile_kernels.py
+    except ImportError:  # detection falls back to plain OpenCV
+        fused_motion = fused_motion_swar = bbox_of_above = None
+
 
 class MotionDetector:
     """
@@ -16,33 +177,133 @@ class MotionDetector:
     
     The motion detection algorithm:
     1. Captures the specified screen region
-    2. Converts the image to grayscale
+    2. Converts the image to grayscale and shrinks it for faster comparison
     3. Compares with the previous frame using mean squared error
     4. Triggers if the error exceeds the threshold (default: 25)
     """
     
-    def __init__(self, monitor_number=2, threshold=25):
+    def __init__(self, monitor_number=2, threshold=25, target_fps=100, min_area=100,
+                 capture_delay=0.1, save_format="jpg", mask_rects=DEFAULT_MASK_RECTS):
         """
         Initialize the motion detector.
         
         Args:
             monitor_number (int): The monitor number to capture (default: 2)
-            threshold (float): Motion detection threshold (default: 25)
+            threshold (float): Motion detection threshold, 0 to 255 (default: 25)
                              Higher values mean less sensitive to motion
+            target_fps (float): Maximum frames per second to process (default: 100)
+            min_area (int): Smallest motion region to report, in pixels (default: 100)
+            capture_delay (float): Minimum seconds between saved screenshots (default: 0.1)
+            save_format (str): Screenshot format, "jpg" or "png" (default: "jpg")
+            mask_rects (tuple): Regions to ignore, see DEFAULT_MASK_RECTS
         """
+        if not 0 <= threshold <= 255:
+            raise ValueError(f"Threshold must be between 0 and 255: {threshold}")
+        if save_format not in ("jpg", "png"):
+            raise ValueError(f"Unsupported save format: {save_format}")
+
         self.sct = mss.mss()
-        self.monitor_number = monitor_number
+        self.monitor_number = monitor_number  # Also looks up the monitor dict, see the property
         self.threshold = threshold
-        self.min_area = 100
+        self.target_fps = target_fps
+        self._period = 1.0 / target_fps
+        self.min_area = min_area  # In full-resolution pixels
+        self.downscale = 4  # Detection runs on frames shrunk by this factor per axis
         self.prev_frame = None
         self.output_dir = "motion_captures"
         self.last_capture_time = 0
-        self.capture_delay = 0.1  # Minimum delay between captures in seconds
+        self.capture_delay = capture_delay  # Minimum delay between captures in seconds
+        self.save_format = save_format
+        self.mask_rects = tuple(mask_rects)
+        self.jpeg_quality = 85
+        self._outline = None  # Cached mask outline pixels for saved screenshots, see _mask_outline
+        self._outline_key = None
+        self._tj = None
+        if TurboJPEG is not None:
+            try:
+                self._tj = TurboJPEG()
+            except (OSError, RuntimeError):  # libturbojpeg itself is missing
+                pass
+        self._mask = None  # Cached ignore mask, rebuilt only when the frame shape or monitor changes
+        self._inv_mask = None
+        self._mask_key = None
+        self.use_numba = False  # Opt-in fused Numba kernel, see the property
+        self.use_cuda = False  # Run the pipeline on the GPU, needs an OpenCV build with CUDA
+        self._gpu_frame = None  # GPU-side buffers for the cv2.cuda pipeline
+        self._gpu_gray = None
+        self._gpu_prev = None
+        self._gpu_small = None
+        self._gpu_thresh = None
+        self._gpu_inv_mask = None
+        self._gpu_mask_key = None
+        self.use_opencl = False  # Run the OpenCV pipeline on UMat (T-API), see the property
+        self._u_prev = None  # Previous downscaled frame and inverted mask for the UMat pipeline
+        self._u_inv_mask = None
+        self._u_mask_key = None
+        # Opt-in: motion thinner than this many detection pixels is opened away
+        # before labeling, whatever its area (2 drops anything under 8
+        # full-resolution pixels wide at the default downscale of 4). Off by
+        # default since labeling plus min_area already drops small specks
+        self.noise_kernel_size = 0
+        self._noise_kernel = None
+        self.merge_regions = False  # Box all motion together instead of only the largest region
+        # Opt-in: row spacing for the unchanged-screen check. Changes shorter than
+        # this many rows can slip between the sampled rows and go unreported
+        self.static_row_step = 0
+        self._sampled_rows = None
+        # Per-frame work buffers, allocated on the first frame and reused, see _allocate_buffers
+        self._small_buf = None
+        self._thresh_buf = None
+        self._gray_buf = None
+        self._diff_buf = None
         
         # Create output directory if it doesn't exist
         if not os.path.exists(self.output_dir):
             os.makedirs(self.output_dir)
 
+        # Encoding and writing screenshots happens on a background thread so
+        # the capture loop never waits on the disk
+        self._save_q = queue.Queue(maxsize=4)
+        self._save_thread = threading.Thread(target=self._save_worker, daemon=True)
+        self._save_thread.start()
+
+    @property
+    def monitor_number(self):
+        """The monitor number to capture"""
+        return self._monitor_number
+
+    @monitor_number.setter
+    def monitor_number(self, monitor_number):
+        # Look the monitor up once here so capture_screen doesn't every frame
+        self._monitor = self.sct.monitors[monitor_number]
+        self._monitor_number = monitor_number
+
+    @property
+    def use_numba(self):
+        """Whether detection runs through the fused Numba kernels"""
+        return self._use_numba
+
+    @use_numba.setter
+    def use_numba(self, use_numba):
+        # Opt-in: the fused kernels only match the OpenCV pipeline's speed with
+        # several cores or the SWAR variant, and their gray levels are floored
+        # where OpenCV rounds, so they can differ by 1
+        if use_numba and fused_motion is None:
+            raise RuntimeError("numba (or a compile_kernels.py build) is needed for use_numba")
+        self._use_numba = use_numba
+
+    @property
+    def use_opencl(self):
+        """Whether detection runs through UMat; only True when OpenCL is available"""
+        return self._use_opencl
+
+    @use_opencl.setter
+    def use_opencl(self, use_opencl):
+        # Query and enable OpenCL once here rather than on every frame
+        self._use_opencl = bool(use_opencl) and cv2.ocl.haveOpenCL()
+        if self._use_opencl:
+            cv2.ocl.setUseOpenCL(True)
+
     def list_monitors(self):
         """List all available monitors"""
         monitors = self.sct.monitors
@@ -52,156 +313,427 @@ class MotionDetector:
         return monitors
 
     def capture_screen(self):
-        """Capture the specified monitor"""
-        screenshot = self.sct.grab(self.sct.monitors[self.monitor_number])
+        """
+        Capture the specified monitor.
+
+        mss already hands back BGRA bytes, which is OpenCV's channel order,
+        so the frame is returned as a BGRA view over the raw buffer without
+        any copy or color conversion. Slice off the alpha channel
+        (frame[:, :, :3]) where a BGR image is needed.
+        """
+        shot = self.sct.grab(self._monitor)
         #print(f"Capture time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
-        img = Image.frombytes('RGB', screenshot.size, screenshot.rgb)
+        arr = np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
 
-        return cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR)
+        return arr
 
     def create_mask(self, frame):
-        """Create a mask to ignore the bottom left corner and right edge"""
+        """
+        Create a mask covering the regions in mask_rects.
+
+        The mask only depends on the frame size, so it is built once and
+        cached along with its inverse until the shape or monitor changes.
+        The frame is expected at detection resolution, so the ignored
+        regions are shrunk by the downscale factor (rounding outwards).
+        """
         height, width = frame.shape[:2]
+        scale = self.downscale
+        key = (self.monitor_number, height, width, scale, self.mask_rects)
+        if self._mask is not None and self._mask_key == key:
+            return self._mask
+
         # Create a black mask (0) with white region (255) to ignore
         mask = np.zeros((height, width), dtype=np.uint8)
         
-        # Define the region to ignore (bottom left corner)
-        ignore_height = 150  # Height of the ignored region
-        ignore_width = 1600  # Width of the ignored region
-        mask[height-ignore_height:height, 0:ignore_width] = 255
-        
-        # Define the region to ignore (right edge)
-        right_ignore_width = 450  # Width of the ignored region on the right
-        mask[0:height, width-right_ignore_width:width] = 255
+        # Mark the regions to ignore
+        for rect in self.mask_rects:
+            x0, y0, x1, y1 = _resolve_rect(rect, width * scale, height * scale)
+            mask[y0 // scale:math.ceil(y1 / scale), x0 // scale:math.ceil(x1 / scale)] = 255
 
-        # Define the region to ignore (top portion)
-        top_ignore_height = 140  # Height of the ignored region at the top
-        mask[0:top_ignore_height, 0:width] = 255
-
-        
+        self._mask = mask
+        self._inv_mask = cv2.bitwise_not(mask)
+        self._mask_key = key
         return mask
 
-    def find_largest_motion_region(self, diff, mask):
-        """Find the largest region of motion"""
-        # Apply threshold
-        _, thresh = cv2.threshold(diff, self.threshold, 255, cv2.THRESH_BINARY)
-        
-        # Apply mask to ignore bottom left corner
-        thresh = cv2.bitwise_and(thresh, thresh, mask=cv2.bitwise_not(mask))
-        
-        # Find contours
-        contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    def find_largest_motion_region(self, thresh):
+        """
+        Find the largest region of motion.
+
+        Works on the masked binary motion image at detection resolution;
+        the returned bounding box is scaled back up to full-resolution
+        coordinates. With merge_regions set, the box instead covers every
+        motion pixel, which needs a single scan rather than labeling.
+        thresh is modified in place.
+        """
+        # Prune single-pixel noise first so there are fewer regions to trace.
+        # This is a morphological open done as erode + dilate with opposite
+        # anchors, so even kernel sizes don't shift the regions by a pixel.
+        k = self.noise_kernel_size
+        if k:
+            if self._noise_kernel is None or self._noise_kernel.shape != (k, k):
+                self._noise_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (k, k))
+            cv2.erode(thresh, self._noise_kernel, dst=thresh, anchor=(0, 0))
+            cv2.dilate(thresh, self._noise_kernel, dst=thresh, anchor=(k - 1, k - 1))
+
+        scale = self.downscale
+        if self.merge_regions:
+            if bbox_of_above is not None:
+                xmin, ymin, xmax, ymax, area = bbox_of_above(thresh)
+                x, y, w, h = xmin, ymin, xmax - xmin + 1, ymax - ymin + 1
+            else:
+                area = cv2.countNonZero(thresh)
+                x, y, w, h = cv2.boundingRect(thresh)
+            if area == 0 or area * scale * scale < self.min_area:
+                return None
+            x, y, w, h = (int(v) for v in (x, y, w, h))
+            return (x * scale, y * scale, w * scale, h * scale)
+
+        # Label connected regions; stats holds each region's bounding box and area
+        n, _, stats, _ = cv2.connectedComponentsWithStats(thresh, connectivity=8)
         
-        if not contours:
-            return None, None
+        # Label 0 is the background
+        if n < 2:
+            return None
         
-        # Find the largest contour
-        largest_contour = max(contours, key=cv2.contourArea)
-        if cv2.contourArea(largest_contour) < self.min_area:
-            return None, None
+        # Find the largest region
+        idx = int(np.argmax(stats[1:, cv2.CC_STAT_AREA])) + 1
+        if stats[idx, cv2.CC_STAT_AREA] * scale * scale < self.min_area:
+            return None
             
         # Get bounding box
-        x, y, w, h = cv2.boundingRect(largest_contour)
-        return (x, y, w, h), largest_contour
+        x, y, w, h = (int(v) for v in stats[idx, [cv2.CC_STAT_LEFT, cv2.CC_STAT_TOP,
+                                                   cv2.CC_STAT_WIDTH, cv2.CC_STAT_HEIGHT]])
+        return (x * scale, y * scale, w * scale, h * scale)
 
     def detect_motion(self, current_frame):
         """
         Detect motion by comparing current frame with previous frame.
         
         Args:
-            current_frame (numpy.ndarray): Current frame in grayscale
+            current_frame (numpy.ndarray): Current frame in BGRA
             
         Returns:
             bool: True if motion is detected, False otherwise
             tuple: Bounding box coordinates (x, y, w, h) if motion detected, None otherwise
         """
-        if self.prev_frame is None:
-            self.prev_frame = current_frame
+        # Skip all the per-pixel work while the screen is static
+        if self._is_static(current_frame):
+            return False, None
+
+        if self.use_cuda:
+            return self._detect_motion_cuda(current_frame)
+        if self.use_opencl:
+            return self._detect_motion_umat(current_frame)
+        if self.use_numba:
+            return self._detect_motion_numba(current_frame)
+
+        height, width = current_frame.shape[:2]
+        shape = (height // self.downscale, width // self.downscale)
+        # The OpenCV-only buffers are also missing after switching off use_numba
+        first_frame = (self.prev_frame is None or self.prev_frame.shape != shape
+                       or self._gray_buf is None)
+        if first_frame:
+            self._allocate_buffers(height, width)
+
+        cv2.cvtColor(current_frame, cv2.COLOR_BGRA2GRAY, dst=self._gray_buf)
+
+        # Motion only needs coarse localization, so diff a shrunken frame.
+        # The first frame only primes the previous frame.
+        small = self.prev_frame if first_frame else self._small_buf
+        cv2.resize(self._gray_buf, (shape[1], shape[0]), dst=small, interpolation=cv2.INTER_AREA)
+        if first_frame:
             return False, None
 
         # Calculate difference between current and previous frame
-        diff = cv2.absdiff(current_frame, self.prev_frame)
+        cv2.absdiff(small, self.prev_frame, dst=self._diff_buf)
+        
+        # Apply threshold
+        cv2.threshold(self._diff_buf, self.threshold, 255, cv2.THRESH_BINARY, dst=self._thresh_buf)
         
-        # Create and apply mask
-        mask = self.create_mask(current_frame)
+        # Apply mask to ignore the masked regions
+        self.create_mask(small)
+        cv2.bitwise_and(self._thresh_buf, self._inv_mask, dst=self._thresh_buf)
         
         # Find largest motion region
-        bbox, contour = self.find_largest_motion_region(diff, mask)
+        bbox = self.find_largest_motion_region(self._thresh_buf)
         
-        # Update previous frame
-        self.prev_frame = current_frame
+        # Swap the grayscale buffers so the current frame becomes the previous one
+        self.prev_frame, self._small_buf = self._small_buf, self.prev_frame
         
         return bbox is not None, bbox
 
+    def _is_static(self, current_frame):
+        """
+        Cheap check for an unchanged screen, run before the detection pipeline.
+
+        Compares every static_row_step-th row of the frame with the same rows
+        of the last frame that went through detection, which reads only a
+        fraction of the pixels. Changes shorter than static_row_step rows
+        can fall between the sampled rows, so keep the step small.
+        """
+        if not self.static_row_step:
+            return False
+
+        rows = current_frame[::self.static_row_step]
+        if self._sampled_rows is None or self._sampled_rows.shape != rows.shape:
+            self._sampled_rows = rows.copy()
+            return False
+
+        if np.array_equal(rows, self._sampled_rows):
+            return True
+
+        np.copyto(self._sampled_rows, rows)
+        return False
+
+    def _detect_motion_numba(self, current_frame):
+        """Same as detect_motion, with the per-pixel work done by fused_motion"""
+        height, width = current_frame.shape[:2]
+        shape = (height // self.downscale, width // self.downscale)
+        if self.prev_frame is None or self.prev_frame.shape != shape:
+            # Nothing to compare against yet, just prime the previous frame
+            self._allocate_buffers(height, width)
+            self._run_fused_motion(current_frame, self.prev_frame)
+            return False, None
+
+        self._run_fused_motion(current_frame, self._small_buf)
+
+        # Swap the grayscale buffers so the current frame becomes the previous one
+        self.prev_frame, self._small_buf = self._small_buf, self.prev_frame
+
+        bbox = self.find_largest_motion_region(self._thresh_buf)
+        return bbox is not None, bbox
+
+    def _detect_motion_umat(self, current_frame):
+        """
+        Same as detect_motion, through OpenCV's Transparent API.
+
+        Every step works on UMat, which OpenCV dispatches to OpenCL (an iGPU
+        on most laptops) and keeps in device memory between calls; only the
+        downscaled binary motion image is read back for labeling.
+        """
+        height, width = current_frame.shape[:2]
+        shape = (height // self.downscale, width // self.downscale)
+
+        u_gray = cv2.cvtColor(cv2.UMat(current_frame), cv2.COLOR_BGRA2GRAY)
+        u_small = cv2.resize(u_gray, (shape[1], shape[0]), interpolation=cv2.INTER_AREA)
+
+        # The first frame only primes the previous frame
+        if self._u_prev is None or self._thresh_buf is None or self._thresh_buf.shape != shape:
+            self._thresh_buf = np.empty(shape, dtype=np.uint8)
+            self._u_prev = u_small
+            return False, None
+
+        # Upload the inverted mask whenever create_mask rebuilds it
+        self.create_mask(self._thresh_buf)
+        if self._u_mask_key != self._mask_key:
+            self._u_inv_mask = cv2.UMat(self._inv_mask)
+            self._u_mask_key = self._mask_key
+
+        u_diff = cv2.absdiff(u_small, self._u_prev)
+        _, u_thresh = cv2.threshold(u_diff, self.threshold, 255, cv2.THRESH_BINARY)
+        u_thresh = cv2.bitwise_and(u_thresh, self._u_inv_mask)
+        self._u_prev = u_small
+
+        bbox = self.find_largest_motion_region(u_thresh.get())
+        return bbox is not None, bbox
+
+    def _run_fused_motion(self, current_frame, out_gray):
+        """
+        Run the fused kernel from prev_frame into out_gray and _thresh_buf.
+
+        Uses the SWAR kernel, which reads two pixels per 64-bit load, when
+        the frame rows and downscale blocks split evenly into words.
+        """
+        self.create_mask(out_gray)
+        height, width = current_frame.shape[:2]
+        scale = self.downscale
+        if width % 2 == 0 and scale % 2 == 0 and scale <= 22:
+            words = current_frame.reshape(height, width * 4).view(np.uint64)
+            fused_motion_swar(words, self.prev_frame, self._inv_mask, self.threshold, scale,
+                              self._thresh_buf, out_gray)
+        else:
+            fused_motion(current_frame, self.prev_frame, self._inv_mask, self.threshold, scale,
+                         self._thresh_buf, out_gray)
+
+    def _detect_motion_cuda(self, current_frame):
+        """
+        Same as detect_motion, with the per-pixel work done by cv2.cuda.
+
+        The frame is uploaded once and every intermediate image stays on the
+        GPU; only the downscaled binary motion image is downloaded for
+        labeling.
+        """
+        height, width = current_frame.shape[:2]
+        shape = (height // self.downscale, width // self.downscale)
+        first_frame = self._gpu_prev is None or self._thresh_buf.shape != shape
+        if first_frame:
+            self._thresh_buf = np.empty(shape, dtype=np.uint8)
+            self._gpu_frame = cv2.cuda_GpuMat()
+            self._gpu_gray = cv2.cuda_GpuMat(height, width, cv2.CV_8UC1)
+            self._gpu_prev = cv2.cuda_GpuMat(shape[0], shape[1], cv2.CV_8UC1)
+            self._gpu_small = cv2.cuda_GpuMat(shape[0], shape[1], cv2.CV_8UC1)
+            self._gpu_thresh = cv2.cuda_GpuMat(shape[0], shape[1], cv2.CV_8UC1)
+
+        self._gpu_frame.upload(current_frame)
+        cv2.cuda.cvtColor(self._gpu_frame, cv2.COLOR_BGRA2GRAY, dst=self._gpu_gray)
+
+        # The first frame only primes the previous frame
+        small = self._gpu_prev if first_frame else self._gpu_small
+        cv2.cuda.resize(self._gpu_gray, (shape[1], shape[0]), dst=small, interpolation=cv2.INTER_AREA)
+        if first_frame:
+            return False, None
+
+        # Upload the inverted mask whenever create_mask rebuilds it
+        self.create_mask(self._thresh_buf)
+        if self._gpu_mask_key != self._mask_key:
+            self._gpu_inv_mask = cv2.cuda_GpuMat()
+            self._gpu_inv_mask.upload(self._inv_mask)
+            self._gpu_mask_key = self._mask_key
+
+        cv2.cuda.absdiff(small, self._gpu_prev, dst=self._gpu_thresh)
+        cv2.cuda.threshold(self._gpu_thresh, self.threshold, 255, cv2.THRESH_BINARY, dst=self._gpu_thresh)
+        cv2.cuda.bitwise_and(self._gpu_thresh, self._gpu_inv_mask, dst=self._gpu_thresh)
+        self._gpu_thresh.download(self._thresh_buf)
+
+        # Swap the grayscale buffers so the current frame becomes the previous one
+        self._gpu_prev, self._gpu_small = self._gpu_small, self._gpu_prev
+
+        bbox = self.find_largest_motion_region(self._thresh_buf)
+        return bbox is not None, bbox
+
+    def _allocate_buffers(self, height, width):
+        """
+        Allocate the work buffers for frames of the given full resolution.
+
+        prev_frame and _small_buf hold downscaled grayscale frames and are
+        swapped every frame. The full-resolution grayscale and diff buffers
+        are only needed by the OpenCV pipeline.
+        """
+        shape = (height // self.downscale, width // self.downscale)
+        self.prev_frame = np.zeros(shape, dtype=np.uint8)
+        self._small_buf = np.empty(shape, dtype=np.uint8)
+        self._thresh_buf = np.empty(shape, dtype=np.uint8)
+        if self.use_numba:
+            self._gray_buf = None
+            self._diff_buf = None
+        else:
+            self._gray_buf = np.empty((height, width), dtype=np.uint8)
+            self._diff_buf = np.empty(shape, dtype=np.uint8)
+
     def save_screenshot(self, frame, bounding_box=None):
         """
-        Save the current frame as a screenshot with optional motion bounding box.
+        Queue the current frame to be saved with optional motion bounding box.
         
         Args:
             frame (numpy.ndarray): The frame to save
             bounding_box (tuple): Optional bounding box coordinates (x, y, w, h)
             
-        The screenshot is saved as a JPEG file with:
-        - 95% quality for good balance of quality and file size
-        - Filename format: motion_YYYYMMDD_HHMMSS_mmm.jpg
-        - Timing measurement for performance monitoring
+        The frame is copied and handed to the save thread, see
+        _encode_and_write. If the queue is full the screenshot is dropped
+        rather than stalling the capture loop.
         """
-        current_time = time.time()
+        # Only the raw clock reading is taken here, the save thread formats it
+        capture_ns = time.time_ns()
+        current_time = capture_ns / 1e9
         if current_time - self.last_capture_time >= self.capture_delay:
-            # Start timing
-            save_start = time.time()
-            
-            # Create a copy of the frame for visualization
-            vis_frame = frame.copy()
-            
-            # Draw red bounding box if motion was detected
-            if bounding_box:
-                x, y, w, h = bounding_box
-                cv2.rectangle(vis_frame, (x, y), (x+w, y+h), (0, 0, 255), 2)
+            try:
+                self._save_q.put_nowait((frame.copy(), bounding_box, capture_ns))
+            except queue.Full:
+                print("Save queue full, dropping screenshot")
+                return
             
-            # Draw purple bounding boxes around masked regions
-            height, width = vis_frame.shape[:2]
-            ignore_height = 150  # Height of the ignored region
-            ignore_width = 1600  # Width of the ignored region
+            self.last_capture_time = current_time
 
-            
-            # Bottom left corner mask (timestamp region)
+    def _save_worker(self):
+        """Save thread body: write queued screenshots until a None item arrives"""
+        while True:
+            item = self._save_q.get()
+            try:
+                if item is None:
+                    return
+                self._encode_and_write(*item)
+            except Exception as e:
+                # A failed save must not take the thread down with it
+                print(f"Failed to save screenshot: {e}")
+            finally:
+                self._save_q.task_done()
 
-            cv2.rectangle(vis_frame, 
-                         (0, height-ignore_height), 
-                         (ignore_width, height), 
-                         (255, 0, 255),  # Purple color
-                         2)
-            
-            # Right edge mask
-            right_ignore_width = 450
-            cv2.rectangle(vis_frame, 
-                         (width-right_ignore_width, 0), 
-                         (width, height), 
-                         (255, 0, 255),  # Purple color
-                         2)
-            
-            # top 
-            top_ignore_height = 140  # Height of the ignored region at the top
-            # draw a rectangle on the top of the screen
-            cv2.rectangle(vis_frame, 
-                         (0, 0), 
-                         (width, top_ignore_height), 
-                         (255, 0, 255),  # Purple color
-                         2)
-            
-            # Use datetime with milliseconds for unique filenames
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:19]  # Truncate to 3 decimal places
-            filename = os.path.join(self.output_dir, f"motion_{timestamp}.jpg")
-            
-            # Save with JPEG compression (95% quality, much faster than PNG)
-            cv2.imwrite(filename, vis_frame, [cv2.IMWRITE_JPEG_QUALITY, 95])
-            
-            # Calculate and print timing
-            save_time = time.time() - save_start
-            print(f"Saved screenshot: {filename} (took {save_time:.3f} seconds)")
-            
-            self.last_capture_time = current_time
+    def _stop_saving(self, timeout=5.0):
+        """Let already queued screenshots finish writing, waiting at most about timeout seconds"""
+        if not self._save_thread.is_alive():
+            return
+        try:
+            self._save_q.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._save_thread.join(timeout)
+
+    def _encode_and_write(self, vis_frame, bounding_box, capture_ns):
+        """
+        Draw the overlays onto a queued frame and write it to disk.
+        
+        The screenshot is saved in save_format with:
+        - JPEG: 85% quality for good balance of quality, file size and encode time
+        - PNG: lossless, with OpenCV's default compression
+        - Filename format: motion_YYYYMMDD_HHMMSS_mmm.jpg (or .png)
+        - Timing measurement for performance monitoring
+        """
+        # Start timing
+        save_start = time.time()
+        
+        # Draw red bounding box if motion was detected
+        if bounding_box:
+            x, y, w, h = bounding_box
+            cv2.rectangle(vis_frame, (x, y), (x+w, y+h), (0, 0, 255), 2)
+        
+        # Draw purple bounding boxes around masked regions
+        vis_frame.reshape(-1, 3)[self._mask_outline(vis_frame.shape[:2])] = (255, 0, 255)
+        
+        # Local time with milliseconds for unique filenames
+        sec, rem = divmod(capture_ns, 1_000_000_000)
+        lt = time.localtime(sec)
+        timestamp = (f"{lt.tm_year:04d}{lt.tm_mon:02d}{lt.tm_mday:02d}_"
+                     f"{lt.tm_hour:02d}{lt.tm_min:02d}{lt.tm_sec:02d}_{rem // 1_000_000:03d}")
+        filename = os.path.join(self.output_dir, f"motion_{timestamp}.{self.save_format}")
+        
+        # Save with JPEG compression, through libturbojpeg's SIMD encoder when available
+        if self.save_format == "png":
+            written = cv2.imwrite(filename, vis_frame)
+        elif self._tj is not None:
+            with open(filename, 'wb') as f:
+                f.write(self._tj.encode(vis_frame, quality=self.jpeg_quality, pixel_format=TJPF_BGR))
+            written = True
+        else:
+            written = cv2.imwrite(filename, vis_frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        # cv2.imwrite reports failure by returning False rather than raising
+        if not written:
+            raise OSError(f"Could not write {filename}")
+        
+        # Calculate and print timing
+        save_time = time.time() - save_start
+        print(f"Saved screenshot: {filename} (took {save_time:.3f} seconds)")
+
+    def _mask_outline(self, shape):
+        """
+        Flat pixel indices of the purple outlines drawn around the masked regions.
+
+        The outlines never change for a given frame size, so they are drawn
+        once into a single-channel image and only the indices of the stroke
+        pixels are kept. Saving then paints just those pixels.
+        """
+        key = (shape, self.mask_rects)
+        if self._outline is not None and self._outline_key == key:
+            return self._outline
+
+        height, width = shape
+        outline = np.zeros(shape, dtype=np.uint8)
+        for rect in self.mask_rects:
+            x0, y0, x1, y1 = _resolve_rect(rect, width, height)
+            cv2.rectangle(outline, (x0, y0), (x1, y1), 255, 2)
+        
+        self._outline = np.flatnonzero(outline)
+        self._outline_key = key
+        return self._outline
 
     def run(self):
         """Main loop for motion detection"""
@@ -211,6 +743,9 @@ class MotionDetector:
         print(f"\nCapturing monitor {self.monitor_number}: {monitors[self.monitor_number]['width']}x{monitors[self.monitor_number]['height']}")
         print("Press Ctrl+C to stop")
         
+        # Frames are paced against a fixed schedule, so time spent capturing
+        # and detecting counts towards the frame period instead of adding to it
+        next_tick = time.perf_counter() + self._period
         try:
             while True:
                 # Capture current frame
@@ -220,22 +755,27 @@ class MotionDetector:
                 motion_detected, bbox = self.detect_motion(frame)
                 if motion_detected:
                     print("Motion detected!")
-                    self.save_screenshot(frame, bbox)
+                    self.save_screenshot(frame[:, :, :3], bbox)
                 
-                # Small delay to reduce CPU usage
-                time.sleep(0.01)
+                # Sleep only for what is left of the frame period
+                dt = next_tick - time.perf_counter()
+                if dt > 0:
+                    time.sleep(dt)
+                next_tick += self._period
+                if dt < -self._period:
+                    # More than a frame behind, start a new schedule rather than bursting to catch up
+                    next_tick = time.perf_counter() + self._period
                 
         except KeyboardInterrupt:
             print("\nStopping motion detection...")
+            self._stop_saving()
 
-if __name__ == "__main__":
-    # First, create a temporary detector to list monitors
-    temp_detector = MotionDetector(0)
-    monitors = temp_detector.list_monitors()
-    
+def run_default():
+    """Run a motion detector with the default settings"""
     # Default to monitor 2, but keep the selection code for future use
     monitor_number = 2  # Default to monitor 2
     # Uncomment the following lines to enable monitor selection
+    # monitors = mss.mss().monitors
     # while True:
     #     try:
     #         monitor_number = int(input("\nEnter the monitor number to capture: "))
@@ -247,4 +787,8 @@ if __name__ == "__main__":
     
     # Create and run the motion detector with the selected monitor
     detector = MotionDetector(monitor_number=monitor_number)
-    detector.run() 
\ No newline at end of file
+    detector.run()
+
+
+if __name__ == "__main__":
+    run_default()